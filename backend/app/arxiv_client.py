@@ -2,37 +2,81 @@
 ArXiv API Client for Yuzu
 
 Handles searching papers on ArXiv and parsing results into structured format.
-Uses feedparser to parse ArXiv's Atom feed responses.
+Parses ArXiv's Atom feed responses directly with lxml.etree.
 """
 
-import feedparser
 import re
 from typing import List, Optional, Dict
 from datetime import datetime
 from urllib.parse import urlencode
 import httpx
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+from lxml import etree
+from cachetools import TTLCache
 from app.models import Paper
 import io
+import os
+import time
 import asyncio
-import pdfplumber
+import diskcache
+import fitz  # PyMuPDF
+from app.config import get_settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Compiled once at import so hot loops (per entry, per PDF page) skip
+# the re module's cache lookup and argument parsing
+_VERSION_RE = re.compile(r'v\d+$')
+_WHITESPACE_RE = re.compile(r'\s+')
+# One alternation handles both blank-line collapsing and run-of-space
+# collapsing in a single scan of the (up to 50k-char) text
+_WS_CLEAN_RE = re.compile(r'(\n\s*\n)|( {2,})')
+_ABSTRACT_PREFIX_RE = re.compile(r'^Abstract:\s*')
+
+# ArXiv's Atom feed is a stable, well-formed schema; parsing it with
+# lxml directly skips feedparser's per-entry sanitization overhead
+_ATOM = '{http://www.w3.org/2005/Atom}'
 
 
 class ArxivClient:
     """Client for interacting with ArXiv API"""
     
     BASE_URL = "http://export.arxiv.org/api/query"
+    # How long cached full text is served without revalidating upstream
+    FULLTEXT_TTL = 86400
     
     def __init__(self):
-        # Simple in-memory cache to avoid duplicate API calls
+        # Bounded in-memory caches to avoid duplicate API calls.
+        # Search results refresh hourly; full text is stable for a day.
         # Key format: "query:max_results:sort_by"
-        self.cache: Dict[str, List[Paper]] = {}
-        # Cache for full text content
-        self.fulltext_cache: Dict[str, str] = {}
+        self.cache: TTLCache = TTLCache(maxsize=500, ttl=3600)
+        # Cache for full text content, keyed by paper ID. Disk-backed so
+        # warm entries survive restarts and are shared across workers;
+        # search results stay in-memory since they expire quickly anyway.
+        self.fulltext_cache = diskcache.Cache(
+            os.path.join(get_settings().cache_dir, "fulltext"),
+            size_limit=2 << 30
+        )
+        # In-flight full-text fetches, so concurrent requests for the
+        # same paper collapse into one download/parse
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # Shared pooled HTTP client reused for every ArXiv request.
+        # Keep-alive + HTTP/2 avoid a fresh TCP/TLS handshake per fetch.
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(60.0),
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+            http2=True,
+            headers={"User-Agent": "Yuzu/1.0"}
+        )
+
+    async def aclose(self):
+        """Close the shared HTTP client (called on app shutdown)"""
+        await self._client.aclose()
     
-    def search(
-        self, 
-        query: str, 
+    async def search(
+        self,
+        query: str,
         max_results: int = 20,
         sort_by: str = "relevance"
     ) -> List[Paper]:
@@ -53,7 +97,7 @@ class ArxivClient:
         # Check cache first
         cache_key = f"{query}:{max_results}:{sort_by}"
         if cache_key in self.cache:
-            print(f"Cache hit for query: {query}")
+            logger.info(f"Cache hit for query: {query}")
             return self.cache[cache_key]
         
         # Build ArXiv API query
@@ -72,29 +116,23 @@ class ArxivClient:
         param_str = urlencode(params)
         url = f"{self.BASE_URL}?{param_str}"
         
-        print(f"Fetching papers from ArXiv: {url}")
+        logger.info(f"Fetching papers from ArXiv: {url}")
         
         try:
-            # Parse RSS/Atom feed from ArXiv
-            feed = feedparser.parse(url)
-            
-            # Check for parsing errors
-            if feed.bozo:
-                raise Exception(f"Feed parsing error: {feed.bozo_exception}")
-            
+            # Fetch the Atom XML with the shared client so the event loop
+            # stays free during the ArXiv round-trip, then parse the bytes
+            # in a worker thread (mirrors the PDF-extraction pattern below) so
+            # a max_results=100 response doesn't stall other coroutines
+            response = await self._client.get(url)
+            response.raise_for_status()
+            papers = await asyncio.to_thread(self._parse_feed, response.content)
+
             # Check if we got any entries
-            if not feed.entries:
-                print(f"No papers found for query: {query}")
+            if not papers:
+                logger.info(f"No papers found for query: {query}")
                 return []
             
-            # Convert entries to Paper objects
-            papers = []
-            for entry in feed.entries:
-                paper = self._parse_entry(entry)
-                if paper:
-                    papers.append(paper)
-            
-            print(f"Successfully parsed {len(papers)} papers")
+            logger.info(f"Successfully parsed {len(papers)} papers")
             
             # Cache results
             self.cache[cache_key] = papers
@@ -102,63 +140,79 @@ class ArxivClient:
             return papers
             
         except Exception as e:
-            print(f"ArXiv search error: {e}")
+            logger.error(f"ArXiv search error: {e}")
             raise Exception(f"Failed to search ArXiv: {str(e)}")
     
+    def _parse_feed(self, content: bytes) -> List[Paper]:
+        """Parse an ArXiv Atom response into Paper objects"""
+        root = etree.fromstring(content)
+        papers = []
+        for entry in root.findall(f'{_ATOM}entry'):
+            paper = self._parse_entry(entry)
+            if paper:
+                papers.append(paper)
+        return papers
+
     def _parse_entry(self, entry) -> Optional[Paper]:
         """
-        Parse a single feedparser entry into a Paper object
-        
+        Parse a single Atom <entry> element into a Paper object
+
         Entry structure from ArXiv:
-        - entry.id: ArXiv URL (e.g., http://arxiv.org/abs/1706.03762v5)
-        - entry.title: Paper title
-        - entry.authors: List of author objects with .name attribute
-        - entry.summary: Abstract text
-        - entry.published: Publication date
-        - entry.links: List of links including PDF
-        - entry.tags: List of category tags
+        - <id>: ArXiv URL (e.g., http://arxiv.org/abs/1706.03762v5)
+        - <title>: Paper title
+        - <author><name>: One element per author
+        - <summary>: Abstract text
+        - <published>: Publication date
+        - <link title="pdf">: PDF link
+        - <category term="...">: Category tags
         """
         try:
+            entry_id = entry.findtext(f'{_ATOM}id')
+            if not entry_id:
+                return None
+
             # Extract ArXiv ID from URL
             # Example: http://arxiv.org/abs/1706.03762v5 -> 1706.03762
-            arxiv_id = entry.id.split("/abs/")[-1]
+            arxiv_id = entry_id.rpartition("/abs/")[2] or entry_id
             # Remove version suffix
-            arxiv_id = re.sub(r'v\d+$', '', arxiv_id)
-            
+            arxiv_id = _VERSION_RE.sub('', arxiv_id)
+
             # Extract authors
-            authors = []
-            if hasattr(entry, 'authors'):
-                authors = [author.name for author in entry.authors]
-            
+            authors = [
+                name.text for name in entry.findall(f'{_ATOM}author/{_ATOM}name')
+                if name.text
+            ]
+
             # Extract categories (tags)
-            categories = []
-            if hasattr(entry, 'tags'):
-                categories = [tag.term for tag in entry.tags]
-            
+            categories = [
+                tag.get('term') for tag in entry.findall(f'{_ATOM}category')
+                if tag.get('term')
+            ]
+
             # Find PDF link
             pdf_url = None
-            arxiv_url = entry.id
-            
-            for link in entry.links:
+            arxiv_url = entry_id
+
+            for link in entry.findall(f'{_ATOM}link'):
                 if link.get('title') == 'pdf':
-                    pdf_url = link.href
+                    pdf_url = link.get('href')
                     break
-            
+
             # Fallback: construct PDF URL from ID
             if not pdf_url:
                 pdf_url = f"https://arxiv.org/pdf/{arxiv_id}.pdf"
-            
+
             # Clean abstract text
             # Remove excessive whitespace and newlines
-            abstract = re.sub(r'\s+', ' ', entry.summary).strip()
-            
+            abstract = _WHITESPACE_RE.sub(' ', entry.findtext(f'{_ATOM}summary') or '').strip()
+
             # Parse published date
-            published = entry.published
-            
+            published = entry.findtext(f'{_ATOM}published') or ''
+
             # Create Paper object
             return Paper(
                 id=arxiv_id,
-                title=entry.title.strip(),
+                title=(entry.findtext(f'{_ATOM}title') or '').strip(),
                 authors=authors,
                 abstract=abstract,
                 published=published,
@@ -166,90 +220,214 @@ class ArxivClient:
                 arxiv_url=arxiv_url,
                 categories=categories
             )
-            
-        except Exception as e:
-            print(f"Error parsing entry: {e}")
+
+        except (AttributeError, TypeError, ValueError) as e:
+            # ValueError also covers pydantic validation failures; anything
+            # else is a genuine bug and should surface
+            logger.warning(f"Error parsing entry: {e}")
             return None
     
     async def get_full_text(self, paper_id: str) -> Optional[str]:
         """
-        Fetch full text content from the paper's PDF using pdfplumber
-        
+        Fetch full text content from the paper's PDF using PyMuPDF
+
+        Concurrent requests for the same paper share a single fetch: the
+        first caller does the download/parse, later callers await its
+        future instead of kicking off duplicate work.
+
         Args:
             paper_id: ArXiv paper ID (e.g., "1706.03762")
-        
+
         Returns:
             Full text of the paper (first ~50k chars), or None if not available
         """
-        # Check cache first
-        if paper_id in self.fulltext_cache:
-            print(f"Full text cache hit for {paper_id}")
-            return self.fulltext_cache[paper_id]
-        
+        # Check cache first. Entries carry the ETag ArXiv's CDN returned,
+        # so a stale hit can be revalidated with a cheap conditional GET
+        # (a 304 skips both the body transfer and the PDF parse).
+        entry = self.fulltext_cache.get(paper_id)
+        if entry is not None:
+            if isinstance(entry, str):
+                # Entry written before validators were stored; diskcache
+                # expires it on its own
+                logger.info(f"Full text cache hit for {paper_id}")
+                return entry
+            if time.time() - entry['fetched_at'] < self.FULLTEXT_TTL:
+                logger.info(f"Full text cache hit for {paper_id}")
+                return entry['text']
+            refreshed = await self._revalidate_full_text(paper_id, entry)
+            if refreshed is not None:
+                return refreshed
+
+        # Join an in-flight fetch for the same paper if one exists
+        existing = self._inflight.get(paper_id)
+        if existing is not None:
+            logger.info(f"Joining in-flight full text fetch for {paper_id}")
+            return await existing
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[paper_id] = future
+        try:
+            result = await self._fetch_full_text(paper_id)
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            self._inflight.pop(paper_id, None)
+
+    def _cache_full_text(self, paper_id: str, text: str, etag: Optional[str]):
+        """Store full text with its HTTP validator for later revalidation"""
+        self.fulltext_cache.set(
+            paper_id,
+            {'text': text, 'etag': etag, 'fetched_at': time.time()}
+        )
+
+    async def _revalidate_full_text(self, paper_id: str, entry: dict) -> Optional[str]:
+        """
+        Revalidate a stale cache entry with If-None-Match
+
+        Returns the (still valid) cached text on a 304, or None when the
+        content changed or no validator is available, in which case the
+        caller falls through to a full refetch.
+        """
+        etag = entry.get('etag')
+        if not etag:
+            return None
         pdf_url = f"https://arxiv.org/pdf/{paper_id}.pdf"
         try:
-            print(f"Fetching PDF from {pdf_url}")
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.get(pdf_url, follow_redirects=True)
-                
-                # If we received a PDF payload, try to parse it
+            # Stream so a 200 (content changed) can be abandoned without
+            # downloading the body; the normal fetch path will re-get it
+            async with self._client.stream(
+                "GET", pdf_url,
+                headers={"If-None-Match": etag},
+                follow_redirects=True
+            ) as response:
+                if response.status_code == 304:
+                    logger.info(f"Full text for {paper_id} unchanged (304), refreshing TTL")
+                    self._cache_full_text(paper_id, entry['text'], etag)
+                    return entry['text']
+        except Exception as e:
+            logger.warning(f"Revalidation failed for {paper_id}: {e}")
+        return None
+
+    async def _fetch_full_text(self, paper_id: str) -> Optional[str]:
+        """Do the actual PDF download/parse (see get_full_text)"""
+        pdf_url = f"https://arxiv.org/pdf/{paper_id}.pdf"
+        try:
+            logger.info(f"Fetching PDF from {pdf_url}")
+            # Stream the download in chunks instead of materializing
+            # response.content, so we never hold a second copy of a
+            # multi-megabyte PDF alongside the parse buffer
+            pdf_buf = None
+            status_code = None
+            content_type = ''
+            etag = None
+            async with self._client.stream("GET", pdf_url, follow_redirects=True) as response:
+                status_code = response.status_code
                 content_type = response.headers.get('content-type', '')
-                if response.status_code == 200 and (response.content and ('pdf' in content_type or response.content[:4] == b'%PDF')):
-                    
-                    # run the blocking pdfplumber parsing in a thread
-                    def _extract_text_from_pdf(pdf_bytes: bytes) -> str:
-                        text_parts = []
-                        try:
-                            with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
-                                for page in pdf.pages:
-                                    try:
-                                        page_text = page.extract_text()
-                                    except Exception:
-                                        page_text = None
-                                    if page_text:
-                                        text_parts.append(page_text)
-                        except Exception as e:
-                            print(f"pdfplumber error for {paper_id}: {e}")
-                            return ""
-                        joined = "\n\n".join(text_parts)
-                        joined = re.sub(r'\n\s*\n', '\n\n', joined)
-                        joined = re.sub(r' +', ' ', joined)
-                        return joined
-                    
-                    extracted = await asyncio.to_thread(_extract_text_from_pdf, response.content)
-                    
-                    if extracted:
-                        if len(extracted) > 50000:
-                            extracted = extracted[:50000] + "\n\n[Content truncated due to length...]"
-                        
-                        self.fulltext_cache[paper_id] = extracted
-                        print(f"Successfully extracted full text for {paper_id} ({len(extracted)} chars)")
-                        return extracted
-                    else:
-                        print(f"No text extracted from PDF for {paper_id}, falling back to abstract page")
+                etag = response.headers.get('etag')
+                if status_code == 200:
+                    buf = io.BytesIO()
+                    async for chunk in response.aiter_bytes(65536):
+                        buf.write(chunk)
+                    if buf.tell() and ('pdf' in content_type or bytes(buf.getbuffer()[:4]) == b'%PDF'):
+                        pdf_buf = buf
+
+            # If we received a PDF payload, try to parse it
+            if pdf_buf is not None:
+
+                # run the blocking PyMuPDF parsing in a thread
+                def _extract_text_from_pdf(pdf_file: io.BytesIO) -> str:
+                    text_parts = []
+                    total = 0
+                    try:
+                        pdf_file.seek(0)
+                        with fitz.open(stream=pdf_file.read(), filetype="pdf") as pdf:
+                            for page in pdf:
+                                try:
+                                    page_text = page.get_text("text")
+                                except Exception:
+                                    page_text = None
+                                if page_text:
+                                    text_parts.append(page_text)
+                                    total += len(page_text)
+                                    # We truncate to 50k chars below anyway;
+                                    # stop parsing pages we'd throw away
+                                    if total >= 60000:
+                                        break
+                    except Exception as e:
+                        logger.warning(f"PyMuPDF error for {paper_id}: {e}")
+                        return ""
+                    joined = "\n\n".join(text_parts)
+                    joined = _WS_CLEAN_RE.sub(
+                        lambda m: '\n\n' if m.group(1) else ' ', joined
+                    )
+                    return joined
+
+                extracted = await asyncio.to_thread(_extract_text_from_pdf, pdf_buf)
+
+                if extracted:
+                    if len(extracted) > 50000:
+                        extracted = extracted[:50000] + "\n\n[Content truncated due to length...]"
+
+                    self._cache_full_text(paper_id, extracted, etag)
+                    logger.info(f"Successfully extracted full text for {paper_id} ({len(extracted)} chars)")
+                    return extracted
                 else:
-                    print(f"PDF not available at {pdf_url} (status={response.status_code}, content-type={content_type})")
-                
-                # Fallback: try abstract page (as before)
-                abs_url = f"https://arxiv.org/abs/{paper_id}"
-                print(f"Fetching abstract page from {abs_url}")
-                response = await client.get(abs_url)
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    abstract_block = soup.find('blockquote', class_='abstract')
-                    if abstract_block:
-                        abstract_text = abstract_block.get_text(strip=True)
-                        abstract_text = re.sub(r'^Abstract:\s*', '', abstract_text)
-                        self.fulltext_cache[paper_id] = abstract_text
-                        print(f"Falling back to abstract for {paper_id} (full text not available)")
-                        return abstract_text
-                
-                print(f"Could not fetch full text for {paper_id}")
-                return None
-                
+                    logger.info(f"No text extracted from PDF for {paper_id}, falling back to abstract page")
+            else:
+                logger.info(f"PDF not available at {pdf_url} (status={status_code}, content-type={content_type})")
+
+            # Fallback: try abstract page (as before)
+            abs_url = f"https://arxiv.org/abs/{paper_id}"
+            logger.info(f"Fetching abstract page from {abs_url}")
+            response = await self._client.get(abs_url, follow_redirects=True)
+            # Short-circuit on the headers before touching the body at all
+            if response.status_code == 200 and 'text/html' in response.headers.get('content-type', ''):
+                # lxml (C) is an order of magnitude faster than html.parser
+                # on ArXiv pages; pass bytes so it handles the charset itself,
+                # and only parse the blockquote subtree we actually read
+                soup = BeautifulSoup(
+                    response.content, 'lxml',
+                    parse_only=SoupStrainer('blockquote')
+                )
+                abstract_block = soup.find('blockquote', class_='abstract')
+                if abstract_block:
+                    abstract_text = abstract_block.get_text(strip=True)
+                    abstract_text = _ABSTRACT_PREFIX_RE.sub('', abstract_text)
+                    self._cache_full_text(paper_id, abstract_text, None)
+                    logger.info(f"Falling back to abstract for {paper_id} (full text not available)")
+                    return abstract_text
+
+            logger.warning(f"Could not fetch full text for {paper_id}")
+            return None
+
         except Exception as e:
-            print(f"Error fetching full text for {paper_id}: {e}")
+            logger.error(f"Error fetching full text for {paper_id}: {e}")
             return None
 
+    async def get_full_texts(self, paper_ids: List[str]) -> Dict[str, Optional[str]]:
+        """
+        Fetch full text for multiple papers concurrently
+
+        Fetches run in parallel over the shared pooled client, capped at
+        8 in flight to stay polite to ArXiv's rate limits.
+
+        Args:
+            paper_ids: ArXiv paper IDs to fetch
+
+        Returns:
+            Dict mapping each paper ID to its full text (or None if unavailable)
+        """
+        semaphore = asyncio.Semaphore(8)
+
+        async def fetch_one(paper_id: str):
+            async with semaphore:
+                return paper_id, await self.get_full_text(paper_id)
+
+        results = await asyncio.gather(*(fetch_one(pid) for pid in paper_ids))
+        return dict(results)
+
 # Create singleton instance
 arxiv_client = ArxivClient()
@@ -4,9 +4,18 @@ BibTeX generation utilities for Yuzu
 Converts paper metadata into BibTeX citation format
 """
 
+import io
 import re
 from datetime import datetime
-from typing import Dict, Any
+from functools import lru_cache
+from typing import Dict, Any, Optional
+
+# Compiled once at import; these run for every paper in an export
+_WORD_RE = re.compile(r'[A-Za-z0-9]+')
+_VERSION_RE = re.compile(r'v\d+$')
+
+# Single-pass translation table for escaping braces in titles
+_BRACE_TABLE = str.maketrans({'{': '\\{', '}': '\\}'})
 
 
 def generate_citation_key(authors: list[str], title: str, year: str) -> str:
@@ -15,16 +24,13 @@ def generate_citation_key(authors: list[str], title: str, year: str) -> str:
     
     Example: Anderson2024AttentionIsAllYouNeed
     """
-    # Get first author's last name
-    if authors:
-        first_author = authors[0].split()[-1]  # Get last word (last name)
-        # Clean special characters
-        first_author = re.sub(r'[^a-zA-Z]', '', first_author)
-    else:
-        first_author = "Unknown"
-    
+    # Get first author's last name: one findall both tokenizes and
+    # strips special characters (no separate sub + split passes)
+    author_words = _WORD_RE.findall(authors[0]) if authors else []
+    first_author = author_words[-1] if author_words else "Unknown"
+
     # Get first 3 words of title
-    title_words = re.sub(r'[^a-zA-Z0-9\s]', '', title).split()[:3]
+    title_words = _WORD_RE.findall(title)[:3]
     title_part = ''.join(word.capitalize() for word in title_words)
     
     return f"{first_author}{year}{title_part}"
@@ -38,50 +44,82 @@ def extract_arxiv_id(paper_id: str) -> str:
     - "http://arxiv.org/abs/2301.12345v1" -> "2301.12345"
     - "2301.12345v1" -> "2301.12345"
     """
-    # Remove URL prefix if present
-    arxiv_id = paper_id.split('/')[-1]
+    # Remove URL prefix if present (rpartition avoids the list
+    # allocation split() would make per call)
+    arxiv_id = paper_id.rpartition('/')[2] or paper_id
     
     # Remove version suffix (v1, v2, etc.)
-    arxiv_id = re.sub(r'v\d+$', '', arxiv_id)
+    arxiv_id = _VERSION_RE.sub('', arxiv_id)
     
     return arxiv_id
 
 
-def paper_to_bibtex(paper: Dict[str, Any]) -> str:
+def paper_to_bibtex(paper: Dict[str, Any], now: Optional[datetime] = None) -> str:
     """
     Convert paper metadata to BibTeX format
-    
+
+    Entries are memoized on the paper's metadata, so repeat exports of
+    the same paper skip regeneration entirely.
+
     Args:
         paper: Dictionary with keys: id, title, authors, abstract, published, pdf_url, arxiv_url
-    
+        now: Current time for the missing-date fallback; batch callers pass
+            it once instead of re-reading the clock per paper
+
     Returns:
         BibTeX formatted string
     """
+    return _paper_to_bibtex_cached(
+        paper['id'],
+        paper['title'],
+        tuple(paper['authors']),
+        paper['published'],
+        paper['pdf_url'],
+        paper['arxiv_url'],
+        (now or datetime.now()).year
+    )
+
+
+@lru_cache(maxsize=4096)
+def _paper_to_bibtex_cached(
+    paper_id: str,
+    paper_title: str,
+    authors: tuple,
+    published: str,
+    pdf_url: str,
+    arxiv_url: str,
+    fallback_year: int
+) -> str:
+    """Build a BibTeX entry from hashable paper fields (see paper_to_bibtex)"""
     # Extract year from published date
+    # ArXiv dates end in 'Z'; slice instead of .replace so the common
+    # case does a single allocation
     try:
-        pub_date = datetime.fromisoformat(paper['published'].replace('Z', '+00:00'))
+        if published.endswith('Z'):
+            published = published[:-1] + '+00:00'
+        pub_date = datetime.fromisoformat(published)
         year = pub_date.year
         month = pub_date.strftime('%B').lower()
-    except:
-        year = datetime.now().year
+    except (KeyError, ValueError, AttributeError, TypeError):
+        year = fallback_year
         month = ''
-    
+
     # Generate citation key
     citation_key = generate_citation_key(
-        paper['authors'],
-        paper['title'],
+        authors,
+        paper_title,
         str(year)
     )
-    
+
     # Extract ArXiv ID
-    arxiv_id = extract_arxiv_id(paper['id'])
-    
+    arxiv_id = extract_arxiv_id(paper_id)
+
     # Format authors for BibTeX (Last, First and Last, First and ...)
-    authors_formatted = ' and '.join(paper['authors'])
-    
+    authors_formatted = ' and '.join(authors)
+
     # Escape special characters in title
-    title = paper['title'].replace('{', '\\{').replace('}', '\\}')
-    
+    title = paper_title.translate(_BRACE_TABLE)
+
     # Build BibTeX entry
     bibtex = f"""@article{{{citation_key},
   title = {{{title}}},
@@ -96,8 +134,8 @@ def paper_to_bibtex(paper: Dict[str, Any]) -> str:
   eprint = {{{arxiv_id}}},
   archivePrefix = {{arXiv}},
   primaryClass = {{cs.AI}},
-  url = {{{paper['arxiv_url']}}},
-  note = {{Available at: {paper['pdf_url']}}}
+  url = {{{arxiv_url}}},
+  note = {{Available at: {pdf_url}}}
 }}"""
     
     return bibtex
@@ -113,15 +151,18 @@ def papers_to_bibtex_file(papers: list[Dict[str, Any]]) -> str:
     Returns:
         Complete BibTeX file content
     """
-    header = f"""% BibTeX export from Yuzu
-% Generated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+    # Write into one buffer instead of collecting a list of entries;
+    # avoids a full extra copy on large exports
+    now = datetime.now()
+    buf = io.StringIO()
+    buf.write(f"""% BibTeX export from Yuzu
+% Generated on {now.strftime('%Y-%m-%d %H:%M:%S')}
 % Total papers: {len(papers)}
 
-"""
-    
-    entries = []
-    for paper in papers:
-        entry = paper_to_bibtex(paper)
-        entries.append(entry)
-    
-    return header + '\n\n'.join(entries)
+""")
+    for i, paper in enumerate(papers):
+        if i:
+            buf.write('\n\n')
+        buf.write(paper_to_bibtex(paper, now=now))
+
+    return buf.getvalue()
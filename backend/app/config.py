@@ -1,12 +1,37 @@
+from functools import lru_cache
+from typing import Optional
+
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     google_api_key: str
     gemini_base_url: str = "https://generativelanguage.googleapis.com/v1beta/openai/"
     environment: str = "development"
-    
+    # On-disk cache location (survives restarts, shared across workers)
+    cache_dir: str = "/var/cache/yuzu"
+    # Optional Redis URL for a shared summary cache across workers;
+    # when unset the in-process cache is used alone
+    redis_url: Optional[str] = None
+    # Hedged level-3 summaries: fire a duplicate request after this
+    # many seconds and keep whichever finishes first. Off by default
+    # since the loser's tokens are still billed.
+    hedge_level3: bool = False
+    hedge_delay_seconds: float = 3.0
+    # Task-complexity model routing: the conversational level-1 rewrite
+    # doesn't need the model that reasons over full paper text
+    level1_model: str = "gemini-2.5-flash-lite"
+    fulltext_model: str = "gemini-2.5-flash"
+    # Comma-separated list of origins allowed by CORS
+    cors_origins: str = (
+        "https://yuzu.epicrunze.com,"
+        "https://api-yuzu.epicrunze.com,"
+        "http://localhost:3000"
+    )
+
     class Config:
         env_file = ".env"
 
-settings = Settings()
-
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Load settings on first use; the .env read and validation run once"""
+    return Settings()
@@ -0,0 +1,34 @@
+"""
+Logging setup for Yuzu
+
+Routes all log records through an in-memory queue so the actual
+write() syscalls happen on a background listener thread instead of
+inside the event loop (print/StreamHandler would otherwise serialize
+request handling on the stdout lock under load).
+"""
+
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+_listener = None
+
+
+def setup_logging(level: int = logging.INFO) -> None:
+    """Install the queue handler on the root logger (idempotent)"""
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue: queue.Queue = queue.Queue(-1)
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(
+        logging.Formatter("%(levelname)s:     %(name)s - %(message)s")
+    )
+
+    _listener = QueueListener(log_queue, stream_handler)
+    _listener.start()
+
+    root = logging.getLogger()
+    root.handlers[:] = [QueueHandler(log_queue)]
+    root.setLevel(level)
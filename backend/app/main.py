@@ -1,6 +1,11 @@
-from fastapi import FastAPI, HTTPException, Query
+import hashlib
+import logging
+
+import orjson
+from cachetools import TTLCache
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response
+from fastapi.responses import Response, ORJSONResponse, StreamingResponse
 from typing import List, Dict
 from app.models import (
     SearchResponse, 
@@ -8,6 +13,8 @@ from app.models import (
     SummarizeResponse,
     BatchSummarizeRequest,
     BatchSummarizeResponse,
+    BatchSummarizeJobResponse,
+    BatchSummarizeStatusResponse,
     BibtexGenerateRequest,
     BibtexGenerateResponse,
     BibtexExportRequest,
@@ -16,28 +23,77 @@ from app.models import (
     Paper
 )
 from app.arxiv_client import arxiv_client
-from app.openai_client import openai_client
+from app.openai_client import openai_client, FULLTEXT_LEVELS
 from app.bibtex import paper_to_bibtex, papers_to_bibtex_file
+from app.logging_setup import setup_logging
+from app.config import get_settings
+
+setup_logging()
+logger = logging.getLogger("yuzu")
 
 app = FastAPI(
     title="Yuzu API",
     description="Backend for Yuzu paper discovery app",
-    version="1.0.0"
+    version="1.0.0",
+    # orjson serializes the large list-of-Paper payloads several times
+    # faster than stdlib json
+    default_response_class=ORJSONResponse
 )
 
-# Configure CORS to allow frontend access
+# Configure CORS to allow frontend access; origins are env-tunable so
+# deployments don't need a code change
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=[
-        "https://yuzu.epicrunze.com",  # Production frontend
-        "https://api-yuzu.epicrunze.com",  # Production API (for docs/testing)
-        "http://localhost:3000"
-    ],
+    allow_origins=get_settings().cors_origins.split(","),
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
 )
 
+# Largest body the batch endpoint will even look at; 20 papers with
+# 10KB abstracts fit comfortably, while an oversized payload is
+# rejected before Pydantic validates thousands of Paper models
+MAX_BATCH_BODY_BYTES = 512 * 1024
+
+@app.middleware("http")
+async def limit_batch_body_size(request: Request, call_next):
+    if request.url.path == "/api/summarize/batch":
+        content_length = request.headers.get("content-length", "")
+        if content_length.isdigit() and int(content_length) > MAX_BATCH_BODY_BYTES:
+            return Response(status_code=413)
+    return await call_next(request)
+
+@app.on_event("startup")
+async def startup_event():
+    # Establish the TLS/HTTP2 session to Gemini before traffic arrives
+    await openai_client.warmup()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Release the pooled HTTP connections held by the API clients
+    await arxiv_client.aclose()
+    await openai_client.aclose()
+
+# Serialized search payloads keyed like the ArxivClient search cache;
+# repeat hits skip Pydantic validation and JSON encoding entirely
+_search_payload_cache: TTLCache = TTLCache(maxsize=500, ttl=300)
+
+def _conditional_json_response(request: Request, payload: bytes, max_age: int) -> Response:
+    """
+    Wrap a serialized JSON payload with ETag / Cache-Control validators
+
+    Returns an empty 304 when the client's If-None-Match still matches,
+    so repeat navigations skip the body transfer entirely.
+    """
+    etag = '"' + hashlib.blake2b(payload, digest_size=16).hexdigest() + '"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={max_age}, stale-while-revalidate={max_age * 2}",
+    }
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=payload, media_type="application/json", headers=headers)
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to Yuzu API 🍋"}
@@ -48,6 +104,7 @@ async def health_check():
 
 @app.get("/api/search", response_model=SearchResponse)
 async def search_papers(
+    request: Request,
     query: str = Query(
         ..., 
         description="Search query for papers",
@@ -79,24 +136,33 @@ async def search_papers(
     Sort by submittedDate to get newest papers (better HTML availability).
     """
     try:
-        # Call ArXiv client with sort parameter
-        papers = arxiv_client.search(query, max_results, sort_by)
-        
-        return SearchResponse(
-            papers=papers,
-            query=query,
-            count=len(papers)
-        )
+        cache_key = f"{query}:{max_results}:{sort_by}"
+        payload = _search_payload_cache.get(cache_key)
+        if payload is None:
+            # Call ArXiv client with sort parameter
+            papers = await arxiv_client.search(query, max_results, sort_by)
+
+            response = SearchResponse(
+                papers=papers,
+                query=query,
+                count=len(papers)
+            )
+            payload = orjson.dumps(response.model_dump())
+            _search_payload_cache[cache_key] = payload
+
+        # Search results for a query are stable for minutes; let clients
+        # and CDNs revalidate instead of re-downloading
+        return _conditional_json_response(request, payload, max_age=300)
         
     except Exception as e:
-        print(f"Search endpoint error: {e}")
+        logger.error(f"Search endpoint error: {e}")
         raise HTTPException(
             status_code=500,
             detail=f"Failed to search papers: {str(e)}"
         )
 
 @app.post("/api/summarize", response_model=SummarizeResponse)
-async def summarize_paper(request: SummarizeRequest):
+async def summarize_paper(request: SummarizeRequest, http_request: Request):
     """
     Generate AI summary of a paper
     
@@ -110,10 +176,11 @@ async def summarize_paper(request: SummarizeRequest):
     """
     try:
         # Debug logging
-        print(f"📨 Summarize request received:")
-        print(f"   Level: {request.level}")
-        print(f"   Paper ID: {request.paper_id!r}")
-        print(f"   Abstract length: {len(request.abstract) if request.abstract else 0} chars")
+        logger.debug(
+            "Summarize request received: level=%s paper_id=%r abstract_len=%d",
+            request.level, request.paper_id,
+            len(request.abstract) if request.abstract else 0
+        )
         # Validate abstract length
         if not request.abstract or len(request.abstract) < 50:
             raise HTTPException(
@@ -128,7 +195,7 @@ async def summarize_paper(request: SummarizeRequest):
             )
         
         # Validate paper_id for levels 2 & 3
-        if request.level in [2, 3] and not request.paper_id:
+        if request.level in FULLTEXT_LEVELS and not request.paper_id:
             raise HTTPException(
                 status_code=400,
                 detail=f"paper_id is required for level {request.level} summaries (full text analysis). Received: {request.paper_id!r}"
@@ -141,20 +208,61 @@ async def summarize_paper(request: SummarizeRequest):
             request.paper_id
         )
         
-        return SummarizeResponse(summary=summary)
+        # Summaries for a given (paper, level) are effectively immutable
+        return _conditional_json_response(
+            http_request,
+            orjson.dumps(SummarizeResponse(summary=summary).model_dump()),
+            max_age=86400
+        )
         
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Summarize endpoint error: {e}")
+        logger.error(f"Summarize endpoint error: {e}")
         raise HTTPException(
             status_code=500,
             detail=f"Failed to generate summary: {str(e)}"
         )
 
-@app.post("/api/summarize/batch", response_model=BatchSummarizeResponse)
+@app.post("/api/summarize/stream")
+async def summarize_paper_stream(request: SummarizeRequest):
+    """
+    Stream an AI summary of a paper as server-sent events
+
+    Same levels and validation as /api/summarize, but chunks arrive as
+    they are generated, so the client can render the summary
+    progressively instead of waiting for the full generation.
+    """
+    if not request.abstract or len(request.abstract) < 50:
+        raise HTTPException(
+            status_code=400,
+            detail="Abstract too short. Must be at least 50 characters."
+        )
+
+    if request.level in FULLTEXT_LEVELS and not request.paper_id:
+        raise HTTPException(
+            status_code=400,
+            detail=f"paper_id is required for level {request.level} summaries (full text analysis)."
+        )
+
+    async def event_stream():
+        try:
+            async for chunk in openai_client.generate_summary_stream(
+                request.abstract,
+                request.level,
+                request.paper_id
+            ):
+                yield b"data: " + orjson.dumps({"delta": chunk}) + b"\n\n"
+            yield b"data: [DONE]\n\n"
+        except Exception as e:
+            logger.error(f"Summarize stream error: {e}")
+            yield b"data: " + orjson.dumps({"error": str(e)}) + b"\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+@app.post("/api/summarize/batch", response_model=None)
 async def batch_summarize(request: BatchSummarizeRequest):
     """
     Generate summaries for multiple papers at once
@@ -164,6 +272,10 @@ async def batch_summarize(request: BatchSummarizeRequest):
     
     Useful for pre-loading summaries when displaying initial paper stack.
     Failed summaries will have error message as value.
+
+    With async_mode=true the papers are submitted as one Batch API job
+    (half the per-token cost); the response carries a batch_id to poll
+    via GET /api/summarize/batch/{batch_id}.
     """
     if not request.papers:
         raise HTTPException(
@@ -176,23 +288,57 @@ async def batch_summarize(request: BatchSummarizeRequest):
             status_code=400,
             detail="Maximum 20 papers per batch request"
         )
-    
-    summaries = {}
-    
-    for paper in request.papers:
+
+    if request.async_mode:
         try:
-            summary = await openai_client.generate_summary(
-                paper.abstract,
-                request.level,
-                paper.id  # Pass paper ID for full text fetching
+            batch_id = await openai_client.submit_batch_summaries(
+                request.papers,
+                request.level
             )
-            summaries[paper.id] = summary
+            return BatchSummarizeJobResponse(batch_id=batch_id, status="submitted")
         except Exception as e:
-            print(f"Failed to summarize paper {paper.id}: {e}")
-            summaries[paper.id] = "Summary unavailable"
-    
+            logger.error(f"Batch submit error: {e}")
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to submit batch job: {str(e)}"
+            )
+
+    # Level-1 batches fit in a single Gemini call (abstracts are short);
+    # fall back to per-paper fan-out if the combined call fails
+    if request.level == 1:
+        try:
+            summaries = await openai_client.generate_summaries_level1(request.papers)
+            return BatchSummarizeResponse(summaries=summaries)
+        except Exception as e:
+            logger.warning(f"Combined level-1 batch failed, falling back to fan-out: {e}")
+
+    # Concurrent fan-out (with full-text prefetch for levels 2/3)
+    # lives in the client
+    summaries = await openai_client.generate_batch(request.papers, request.level)
     return BatchSummarizeResponse(summaries=summaries)
 
+@app.get("/api/summarize/batch/{batch_id}", response_model=BatchSummarizeStatusResponse)
+async def batch_summarize_status(batch_id: str):
+    """
+    Poll an asynchronous batch summarize job
+
+    Returns the provider-side job status; once completed, the response
+    includes the summaries keyed by paper ID.
+    """
+    try:
+        status, summaries = await openai_client.get_batch_summaries(batch_id)
+        return BatchSummarizeStatusResponse(
+            batch_id=batch_id,
+            status=status,
+            summaries=summaries
+        )
+    except Exception as e:
+        logger.error(f"Batch status error: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to fetch batch job status: {str(e)}"
+        )
+
 @app.post("/api/bibtex/generate", response_model=BibtexGenerateResponse)
 async def generate_bibtex(paper: BibtexGenerateRequest):
     """
@@ -204,10 +350,10 @@ async def generate_bibtex(paper: BibtexGenerateRequest):
     - ArXiv information
     """
     try:
-        bibtex = paper_to_bibtex(paper.dict())
+        bibtex = paper_to_bibtex(paper.model_dump())
         return BibtexGenerateResponse(bibtex=bibtex)
     except Exception as e:
-        print(f"BibTeX generation error: {e}")
+        logger.error(f"BibTeX generation error: {e}")
         raise HTTPException(
             status_code=500,
             detail=f"Failed to generate BibTeX: {str(e)}"
@@ -229,7 +375,7 @@ async def export_bibtex(request: BibtexExportRequest):
             )
         
         # Convert papers to dicts for bibtex generation
-        papers_data = [paper.dict() for paper in request.papers]
+        papers_data = [paper.model_dump() for paper in request.papers]
         
         # Generate complete BibTeX file
         bibtex_content = papers_to_bibtex_file(papers_data)
@@ -245,7 +391,7 @@ async def export_bibtex(request: BibtexExportRequest):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"BibTeX export error: {e}")
+        logger.error(f"BibTeX export error: {e}")
         raise HTTPException(
             status_code=500,
             detail=f"Failed to export BibTeX: {str(e)}"
@@ -277,11 +423,11 @@ async def chat_about_paper(request: ChatRequest):
             )
         
         # Debug logging
-        print(f"💬 Chat request received:")
-        print(f"   Paper ID: {request.paper_id}")
-        print(f"   Message: {request.message[:100]}...")
-        print(f"   History length: {len(request.conversation_history)}")
-        print(f"   Include full text: {request.include_full_text}")
+        logger.debug(
+            "Chat request received: paper_id=%s history_len=%d include_full_text=%s",
+            request.paper_id, len(request.conversation_history),
+            request.include_full_text
+        )
         
         # Convert conversation history to dict format
         history_dicts = [
@@ -306,7 +452,7 @@ async def chat_about_paper(request: ChatRequest):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Chat endpoint error: {e}")
+        logger.error(f"Chat endpoint error: {e}")
         raise HTTPException(
             status_code=500,
             detail=f"Failed to generate chat response: {str(e)}"
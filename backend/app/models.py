@@ -1,9 +1,13 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Optional, Dict
 from datetime import datetime
 
 class Paper(BaseModel):
     """Academic paper from ArXiv"""
+    # Frozen: papers are immutable once parsed, so cached instances can
+    # be shared freely between responses
+    model_config = ConfigDict(frozen=True)
+
     id: str = Field(..., description="ArXiv paper ID")
     title: str
     authors: List[str]
@@ -33,11 +37,23 @@ class BatchSummarizeRequest(BaseModel):
     """Request to summarize multiple papers at once"""
     papers: List[Paper]
     level: int = Field(1, ge=1, le=3, description="Detail level (1-3)")
+    async_mode: bool = Field(False, description="Submit as an asynchronous batch job instead of waiting for results")
 
 class BatchSummarizeResponse(BaseModel):
     """Response with summaries keyed by paper ID"""
     summaries: Dict[str, str]
 
+class BatchSummarizeJobResponse(BaseModel):
+    """Handle for an asynchronous batch summarize job"""
+    batch_id: str = Field(..., description="Provider batch job ID to poll")
+    status: str = Field(..., description="Initial job status")
+
+class BatchSummarizeStatusResponse(BaseModel):
+    """Status (and, when finished, results) of an asynchronous batch job"""
+    batch_id: str
+    status: str
+    summaries: Optional[Dict[str, str]] = Field(None, description="Summaries keyed by paper ID, present once completed")
+
 class SearchResponse(BaseModel):
     """Response from paper search"""
     papers: List[Paper]
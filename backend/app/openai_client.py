@@ -8,50 +8,81 @@ Level 1: Uses abstract only (quick browsing)
 Level 2 & 3: Uses full paper text from ArXiv HTML (deep analysis)
 """
 
-from openai import OpenAI
+import diskcache
+import httpx
+import orjson
+import tiktoken
+from cachetools import LRUCache, TTLCache
+from openai import AsyncOpenAI
+from redis import asyncio as aioredis
 from typing import Dict, Literal, Optional, List
 import hashlib
-from app.config import settings
-import json
+from app.arxiv_client import arxiv_client
+from app.config import get_settings
+from functools import lru_cache
+import asyncio
+import logging
+import os
 import re
 
-
-class OpenAIClient:
-    """Client for generating paper summaries using Google Gemini via OpenAI SDK"""
-    
-    def __init__(self):
-        # Initialize OpenAI client with Google Gemini endpoint
-        self.client = OpenAI(
-            api_key=settings.google_api_key,
-            base_url=settings.gemini_base_url
-        )
-        
-        # Cache summaries by hash of abstract+level
-        self.cache: Dict[str, str] = {}
-        
-        # Prompt templates for each level
-        self.prompts = {
-            1: self._get_level1_prompt,
-            2: self._get_level2_prompt,
-            3: self._get_level3_prompt,
-        }
-    
-    def _get_cache_key(self, content: str, level: int, paper_id: Optional[str] = None) -> str:
-        """Generate unique cache key from content and level"""
-        # For levels 2 & 3, include paper_id in cache key since we use full text
-        if paper_id and level in [2, 3]:
-            cache_content = f"{paper_id}:{level}"
-        else:
-            cache_content = f"{content}:{level}"
-        return hashlib.md5(cache_content.encode()).hexdigest()
-    
-    def _get_level1_prompt(self, abstract: str) -> str:
-        """
-        Level 1: Quick overview for browsing
-        Target: Someone scrolling through papers quickly
-        Tone: Conversational, accessible, engaging
-        """
-        return f"""You are helping researchers browse papers quickly on Yuzu, an app for discovering research.
+logger = logging.getLogger(__name__)
+
+
+# Bumped whenever any LEVEL*_STATIC prompt changes, so cache entries built
+# from an older prompt wording invalidate automatically
+TEMPLATE_VERSION = 2
+
+# Token budget for full-text prompts: keep the head (intro/methods)
+# and tail (results/discussion) of long papers instead of letting a
+# 100k-token paper blow up cost and latency
+FULLTEXT_TOKEN_BUDGET = 12000
+_HEAD_TOKENS = 8000
+_TAIL_TOKENS = 4000
+
+
+@lru_cache(maxsize=1)
+def _token_encoding():
+    """cl100k_base is a good token-count estimator for Gemini too"""
+    return tiktoken.get_encoding("cl100k_base")
+
+
+def _fit_to_budget(text: str, budget: int = FULLTEXT_TOKEN_BUDGET) -> str:
+    """Truncate text to a token budget, keeping its head and tail"""
+    # Cheap length check first: ~4 chars/token means short texts never
+    # pay for tokenization at all
+    if len(text) <= budget * 3:
+        return text
+    encoding = _token_encoding()
+    tokens = encoding.encode(text)
+    if len(tokens) <= budget:
+        return text
+    return (
+        encoding.decode(tokens[:_HEAD_TOKENS])
+        + "\n\n[... middle of paper trimmed ...]\n\n"
+        + encoding.decode(tokens[-_TAIL_TOKENS:])
+    )
+
+
+# Level sets as preallocated frozensets: membership is a hash lookup
+# with no per-call list allocation
+VALID_LEVELS = frozenset({1, 2, 3})
+FULLTEXT_LEVELS = frozenset({2, 3})
+
+# Prefix (label + newline) of the dynamic user message for each level;
+# prebuilt so the per-call message is one string concatenation with no
+# format-spec parsing
+CONTENT_PREFIXES = {1: "Abstract:\n", 2: "Full Paper Text:\n", 3: "Full Paper Text:\n"}
+
+# Prompt instruction blocks, built once at import. They are sent as
+# the byte-stable system message — providers only reuse their prefix
+# KV cache when the leading tokens are identical across requests, so
+# nothing dynamic may be interpolated here; the per-paper content goes
+# in a separate trailing user message.
+
+# Level 1: Quick overview for browsing
+# Target: Someone scrolling through papers quickly
+# Tone: Conversational, accessible, engaging
+LEVEL1_STATIC = """You are helping researchers browse papers quickly on Yuzu, an app for discovering research.
 
 Summarize this abstract in 3-4 SHORT bullet points using simple, friendly language.
 
@@ -66,18 +97,32 @@ Format as markdown bullet points.
 Add bold to highlight specific important words
 Do not include the title of the paper
 
-Abstract:
-{abstract}
+The abstract follows in the next message."""
 
-Your summary:"""
+# Level 1, batched: same register as LEVEL1_TEMPLATE but for a whole
+# page of abstracts in one call; the model maps paper ids to summaries
+LEVEL1_BATCH_PROMPT = """You are helping researchers browse papers quickly on Yuzu, an app for discovering research.
 
-    def _get_level2_prompt(self, full_text: str) -> str:
-        """
-        Level 2: Key contributions and methodology from full paper
-        Target: Someone interested in the approach
-        Tone: Technical but clear, structured
-        """
-        return f"""You are analyzing a full research paper for someone who wants to understand the technical approach.
+The user message is a JSON array of papers, each with "id" and "abstract".
+For EVERY paper, summarize its abstract in 3-4 SHORT bullet points using simple, friendly language.
+
+Focus on:
+- What problem does this research tackle?
+- What's their approach or solution?
+- Why should someone care about this?
+
+Make it easy to understand, like explaining to a smart friend over coffee.
+Avoid jargon unless necessary. Be enthusiastic about interesting findings!
+Format each summary as markdown bullet points.
+Add bold to highlight specific important words
+Do not include the title of the paper
+
+Return a single JSON object mapping each paper's id to its markdown summary string."""
+
+# Level 2: Key contributions and methodology from full paper
+# Target: Someone interested in the approach
+# Tone: Technical but clear, structured
+LEVEL2_STATIC = """You are analyzing a full research paper for someone who wants to understand the technical approach.
 
 Extract and summarize the KEY CONTRIBUTIONS and METHODOLOGY in 4-6 concise bullet points.
 
@@ -94,18 +139,12 @@ Format as markdown headers (##) and bullet points.
 Add bold to highlight specific important words in-text
 Do not include the title of the paper
 
-Full Paper Text:
-{full_text}
+The full paper text follows in the next message."""
 
-Key points:"""
-
-    def _get_level3_prompt(self, full_text: str) -> str:
-        """
-        Level 3: Comprehensive analysis from full paper
-        Target: Someone doing deep research
-        Tone: Detailed, academic, specific
-        """
-        return f"""You are providing a comprehensive analysis of a full research paper for deep review.
+# Level 3: Comprehensive analysis from full paper
+# Target: Someone doing deep research
+# Tone: Detailed, academic, specific
+LEVEL3_STATIC = """You are providing a comprehensive analysis of a full research paper for deep review.
 
 Provide a thorough summary covering:
 
@@ -135,10 +174,137 @@ Never reference the paper directly
 Do not include the title of the paper
 For in-text latex for math, use the dollar sign (like $some latex$)
 
-Full Paper Text:
-{full_text}
+The full paper text follows in the next message."""
+
+# Static instruction block per level; a module-level constant so call
+# sites do one dict lookup with no instance attribute or bound-method
+# indirection
+LEVEL_PROMPTS = {1: LEVEL1_STATIC, 2: LEVEL2_STATIC, 3: LEVEL3_STATIC}
+
+
+class OpenAIClient:
+    """Client for generating paper summaries using Google Gemini via OpenAI SDK"""
+    
+    def __init__(self):
+        # Initialize OpenAI client with Google Gemini endpoint, on an
+        # explicit pooled transport: keep-alive + HTTP/2 mean repeat
+        # Gemini calls reuse one TLS session instead of handshaking
+        settings = get_settings()
+        self._http_client = httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(60.0, connect=5.0),
+            limits=httpx.Limits(
+                max_connections=100,
+                max_keepalive_connections=50,
+                keepalive_expiry=300.0
+            )
+        )
+        self.client = AsyncOpenAI(
+            api_key=settings.google_api_key,
+            base_url=settings.gemini_base_url,
+            http_client=self._http_client
+        )
+        
+        # Cache summaries by hash of abstract+level, bounded in both
+        # size and age so a long-running server can't accumulate
+        # summaries without limit and day-old entries cycle out
+        self.cache: TTLCache = TTLCache(maxsize=1000, ttl=86400)
+
+        # Optional shared Redis cache so all workers see the same
+        # summaries and they survive restarts; the in-process LRU
+        # stays as a first-level cache (and the only one when Redis
+        # isn't configured)
+        self.redis = (
+            aioredis.from_url(settings.redis_url, decode_responses=True)
+            if settings.redis_url else None
+        )
+
+        # Durable second-level cache: summaries survive restarts and are
+        # shared across worker processes (diskcache is multi-process
+        # safe). Redis, when configured, sits between the LRU and this.
+        self.disk_cache = diskcache.Cache(
+            os.path.join(settings.cache_dir, "summaries"),
+            size_limit=1 << 30
+        )
+
+        # In-flight generations keyed by cache key, so concurrent
+        # identical requests share one Gemini call; the lock makes the
+        # check-and-insert atomic even if an await ever lands between
+        # them
+        self.inflight: Dict[str, asyncio.Future] = {}
+        self._inflight_lock = asyncio.Lock()
+
+        # Model and output-token budget per level: level 1 is a short
+        # rewrite of an abstract, levels 2/3 reason over full text
+        self.models = {
+            1: settings.level1_model,
+            2: settings.fulltext_model,
+            3: settings.fulltext_model,
+        }
+        self.max_tokens = {1: 2048, 2: 20000, 3: 20000}
 
-Summary:"""
+        # Full text keyed by paper_id only, shared by levels 2 and 3;
+        # saves even the arxiv-side (disk) cache round-trip when a user
+        # requests both levels of the same paper
+        self.fulltext_cache: LRUCache = LRUCache(maxsize=256)
+        
+    
+    async def warmup(self):
+        """
+        Prime the TLS/HTTP2 connection to the Gemini endpoint
+
+        Called from app startup so the first user request doesn't pay
+        the ~100-200ms handshake; failures are non-fatal.
+        """
+        try:
+            await self.client.models.list()
+            logger.info("Gemini connection warmed up")
+        except Exception as e:
+            logger.warning(f"Gemini warm-up failed (non-fatal): {e}")
+
+    async def aclose(self):
+        """Close the shared HTTP client (called on app shutdown)"""
+        await self._http_client.aclose()
+
+    def _get_cache_key(self, content: str, level: int, paper_id: Optional[str] = None) -> str:
+        """Generate unique cache key from content and level"""
+        # Deterministic across processes and restarts: the key pins the
+        # model and prompt-template version so rerouting a level or
+        # rewording a template invalidates old entries. For levels 2 & 3
+        # the paper_id stands in for the full text.
+        identity = paper_id if (paper_id and level in FULLTEXT_LEVELS) else content
+        payload = f"{self.models[level]}|{level}|v{TEMPLATE_VERSION}|{identity}"
+        return hashlib.sha256(payload.encode()).hexdigest()
+    
+
+
+    async def _store_summary(self, cache_key: str, summary: str):
+        """Write a summary through every cache layer"""
+        self.cache[cache_key] = summary
+        if self.redis is not None:
+            try:
+                await self.redis.setex(cache_key, 86400 * 30, summary)
+            except Exception as e:
+                logger.warning(f"Redis set failed (continuing without): {e}")
+        self.disk_cache.set(cache_key, summary, expire=7 * 86400)
+
+    async def _get_full_text(self, paper_id: str) -> Optional[str]:
+        """
+        Fetch full paper text, memoized per paper_id across levels
+
+        The cached value is already truncated to the prompt token
+        budget, so repeat level-2/3 requests for the same paper skip
+        both the fetch and the tokenizer.
+        """
+        full_text = self.fulltext_cache.get(paper_id)
+        if full_text is not None:
+            return full_text
+
+        full_text = await arxiv_client.get_full_text(paper_id)
+        if full_text:
+            full_text = _fit_to_budget(full_text)
+            self.fulltext_cache[paper_id] = full_text
+        return full_text
 
     async def generate_summary(
         self, 
@@ -161,97 +327,415 @@ Summary:"""
             ValueError: If level is not 1, 2, or 3, or if paper_id missing for levels 2/3
             Exception: If Gemini API call fails or full text unavailable
         """
-        # Validate level
-        if level not in [1, 2, 3]:
+        # Validate level first: the cache key derives from the per-level
+        # model table, so an invalid level must fail here (with the
+        # documented ValueError) rather than as a KeyError inside it
+        if level not in VALID_LEVELS:
             raise ValueError(f"Invalid level: {level}. Must be 1, 2, or 3")
-        
+
+        # Check cache before any further work: a hit on a trending paper
+        # should cost one dict lookup, not validation and string work
+        cache_key = self._get_cache_key(abstract, level, paper_id)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         # For levels 2 & 3, we need paper_id to fetch full text
-        if level in [2, 3] and not paper_id:
+        if level in FULLTEXT_LEVELS and not paper_id:
             raise ValueError(f"paper_id is required for level {level} summaries (full text analysis)")
-        
-        # Check cache
+
+        if self.redis is not None:
+            try:
+                cached = await self.redis.get(cache_key)
+                if cached:
+                    logger.info(f"Redis cache hit for summary level {level}")
+                    self.cache[cache_key] = cached
+                    return cached
+            except Exception as e:
+                logger.warning(f"Redis get failed (continuing without): {e}")
+
+        cached = self.disk_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Disk cache hit for summary level {level}")
+            self.cache[cache_key] = cached
+            return cached
+
+        # Coalesce concurrent identical requests: the first caller runs
+        # the Gemini call, later ones await its future
+        async with self._inflight_lock:
+            existing = self.inflight.get(cache_key)
+            if existing is None:
+                future = asyncio.get_running_loop().create_future()
+                self.inflight[cache_key] = future
+
+        if existing is not None:
+            logger.info(f"Joining in-flight summary generation for {cache_key}")
+            return await existing
+
+        try:
+            # Level 3 has the longest tail latency; optionally hedge it
+            if level == 3 and get_settings().hedge_level3:
+                summary = await self._hedged_generate(abstract, level, paper_id)
+            else:
+                summary = await self._generate_summary_uncached(abstract, level, paper_id)
+            future.set_result(summary)
+            return summary
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            self.inflight.pop(cache_key, None)
+
+    async def _hedged_generate(
+        self,
+        abstract: str,
+        level: Literal[1, 2, 3],
+        paper_id: Optional[str]
+    ) -> str:
+        """
+        Race two identical generations, keeping the first to finish
+
+        The backup only launches after a P95-ish delay, so in the common
+        case it never fires; when the primary lands in the latency tail
+        the backup usually beats it. Cuts tail latency at the cost of
+        occasionally paying for a duplicate call.
+        """
+        async def delayed_backup():
+            await asyncio.sleep(get_settings().hedge_delay_seconds)
+            return await self._generate_summary_uncached(abstract, level, paper_id)
+
+        primary = asyncio.create_task(
+            self._generate_summary_uncached(abstract, level, paper_id)
+        )
+        backup = asyncio.create_task(delayed_backup())
+
+        pending = {primary, backup}
+        winner_error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    for other in pending:
+                        other.cancel()
+                    return task.result()
+                winner_error = task.exception()
+        # Both attempts failed; surface the last error
+        raise winner_error
+
+    async def _generate_summary_uncached(
+        self,
+        abstract: str,
+        level: Literal[1, 2, 3],
+        paper_id: Optional[str]
+    ) -> str:
+        """
+        Generate a summary on a cache miss (see generate_summary)
+
+        The streaming generator is the single generation path; this just
+        drains it. Caching happens inside the generator on completion.
+        """
+        parts = []
+        async for chunk in self.generate_summary_stream(abstract, level, paper_id):
+            parts.append(chunk)
+        return "".join(parts).strip()
+    
+    async def generate_summary_stream(
+        self,
+        abstract: str,
+        level: Literal[1, 2, 3],
+        paper_id: Optional[str] = None
+    ):
+        """
+        Generate a summary as an async stream of text chunks
+
+        Time-to-first-token on Gemini is a few hundred ms while full
+        generation takes seconds, so streaming lets the frontend render
+        the opening of the summary almost immediately. The full text is
+        cached on completion, and cache hits yield once with the whole
+        summary.
+
+        Args:
+            abstract: Paper abstract text
+            level: Detail level (1-3)
+            paper_id: ArXiv paper ID (required for levels 2 & 3)
+
+        Yields:
+            Text chunks of the summary in order
+
+        Raises:
+            ValueError: Same validation as generate_summary
+            Exception: If the Gemini API call fails
+        """
+        # Validate level
+        if level not in VALID_LEVELS:
+            raise ValueError(f"Invalid level: {level}. Must be 1, 2, or 3")
+
+        if level in FULLTEXT_LEVELS and not paper_id:
+            raise ValueError(f"paper_id is required for level {level} summaries (full text analysis)")
+
+        # Serve cache hits as a single chunk, checking the same layers
+        # generate_summary does (LRU, then Redis, then disk)
         cache_key = self._get_cache_key(abstract, level, paper_id)
-        if cache_key in self.cache:
-            print(f"Cache hit for summary level {level}")
-            return self.cache[cache_key]
-        
+        cached = self.cache.get(cache_key)
+        if cached is None and self.redis is not None:
+            try:
+                cached = await self.redis.get(cache_key)
+            except Exception as e:
+                logger.warning(f"Redis get failed (continuing without): {e}")
+        if cached is None:
+            cached = self.disk_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Cache hit for streamed summary level {level}")
+            self.cache[cache_key] = cached
+            yield cached
+            return
+
         # For levels 2 & 3, fetch full text
         content_to_summarize = abstract
-        if level in [2, 3]:
-            # Import here to avoid circular dependency
-            from app.arxiv_client import arxiv_client
-            
-            print(f"Fetching full text for paper {paper_id}...")
-            full_text = await arxiv_client.get_full_text(paper_id)
-            
-            if not full_text:
-                # Fallback to abstract if full text unavailable
-                print(f"Warning: Full text not available for {paper_id}, using abstract as fallback")
-                content_to_summarize = abstract
-            else:
+        if level in FULLTEXT_LEVELS:
+            full_text = await self._get_full_text(paper_id)
+            if full_text:
                 content_to_summarize = full_text
-        
-        # Get appropriate prompt template
-        prompt_fn = self.prompts[level]
-        prompt = prompt_fn(content_to_summarize)
-        
+
         try:
-            print(f"Generating level {level} summary...")
-            
-            # Call Gemini API via OpenAI SDK, expecting JSON output
-            response = self.client.chat.completions.create(
-                model="gemini-2.5-flash-lite",
+            logger.info(f"Streaming level {level} summary...")
+            # No JSON schema wrapping here: streamed output is forwarded
+            # as raw markdown chunks
+            stream = await self.client.chat.completions.create(
+                model=self.models[level],
                 messages=[
                     {
                         "role": "system",
-                        "content": (
-                            "You are an expert at summarizing academic papers."
-                        ),
+                        "content": LEVEL_PROMPTS[level],
                     },
                     {
                         "role": "user",
-                        "content": prompt,
+                        "content": CONTENT_PREFIXES[level] + content_to_summarize,
                     },
                 ],
-                response_format={
-                    "type": "json_schema",
-                    "json_schema": {
-                        "name": "paper_summary",
-                        "schema": {
-                            "type": "object",
-                            "properties": {
-                            "summary_markdown": {
-                                "type": "string",
-                                "description": (
-                                    "A full markdown-formatted summary of the paper, ready to display. "
-                                    "Include headers and bullet points and formatting yourself. "
-                                    "Do NOT include any JSON or explanations outside the markdown content."
-                                )
-                            }
-                        },
-                        "required": ["summary_markdown"],
-                            "additionalProperties": False,
-                        },
+                max_tokens=self.max_tokens[level],
+                temperature=0.7,
+                stream=True,
+            )
+
+            parts = []
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    parts.append(delta)
+                    yield delta
+
+            summary = "".join(parts).strip()
+            if summary:
+                await self._store_summary(cache_key, summary)
+                logger.info(f"Streamed level {level} summary complete ({len(summary)} chars)")
+
+        except Exception as e:
+            logger.error(f"Gemini streaming error: {e}")
+            raise Exception(f"Failed to stream summary: {str(e)}")
+
+    async def generate_batch(self, papers: List, level: Literal[1, 2, 3]) -> Dict[str, str]:
+        """
+        Generate summaries for a set of papers concurrently
+
+        Fans out generate_summary under a semaphore so network waits
+        overlap without flooding Gemini rate limits. For full-text
+        levels the paper texts are prefetched as a batch first, so each
+        PDF is downloaded and parsed exactly once no matter how many
+        levels or papers share it.
+
+        Args:
+            papers: Paper objects to summarize
+            level: Detail level (1-3)
+
+        Returns:
+            Dict mapping paper ID to summary (or "Summary unavailable")
+        """
+        if level in FULLTEXT_LEVELS:
+            missing = [p.id for p in papers if p.id not in self.fulltext_cache]
+            if missing:
+                await arxiv_client.get_full_texts(missing)
+
+        semaphore = asyncio.Semaphore(16)
+
+        async def summarize_one(paper) -> str:
+            async with semaphore:
+                return await self.generate_summary(paper.abstract, level, paper.id)
+
+        results = await asyncio.gather(
+            *(summarize_one(paper) for paper in papers),
+            return_exceptions=True
+        )
+
+        summaries = {}
+        for paper, result in zip(papers, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Failed to summarize paper {paper.id}: {result}")
+                summaries[paper.id] = "Summary unavailable"
+            else:
+                summaries[paper.id] = result
+        return summaries
+
+    async def generate_summaries_level1(self, papers: List) -> Dict[str, str]:
+        """
+        Generate level-1 summaries for many papers in one Gemini call
+
+        Abstracts are short, so a whole page of them fits in a single
+        request: one round-trip and one prompt overhead instead of N,
+        and only one slot against rate limits. Cached papers are served
+        locally and excluded from the call.
+
+        Args:
+            papers: Paper objects to summarize
+
+        Returns:
+            Dict mapping paper ID to summary (or "Summary unavailable")
+
+        Raises:
+            Exception: If the Gemini call or response parsing fails
+        """
+        summaries: Dict[str, str] = {}
+        pending = []
+        for paper in papers:
+            cached = self.cache.get(self._get_cache_key(paper.abstract, 1))
+            if cached is not None:
+                summaries[paper.id] = cached
+            else:
+                pending.append(paper)
+
+        if not pending:
+            logger.info(f"Level-1 batch fully served from cache ({len(papers)} papers)")
+            return summaries
+
+        try:
+            logger.info(f"Generating {len(pending)} level-1 summaries in one call...")
+            response = await self.client.chat.completions.create(
+                model=self.models[1],
+                messages=[
+                    {
+                        "role": "system",
+                        "content": LEVEL1_BATCH_PROMPT,
                     },
-                },
+                    {
+                        "role": "user",
+                        "content": orjson.dumps(
+                            [{"id": p.id, "abstract": p.abstract} for p in pending]
+                        ).decode(),
+                    },
+                ],
+                response_format={"type": "json_object"},
                 max_tokens=20000,
                 temperature=0.7,
             )
 
-            print(response.choices[0].message.content)
-            summary = json.loads(response.choices[0].message.content).get("summary_markdown", "").strip()
-            
-            # Cache the result
-            self.cache[cache_key] = summary
-            
-            print(f"Successfully generated level {level} summary ({len(summary)} chars)")
-            
-            return summary
-            
+            results = orjson.loads(response.choices[0].message.content)
+            for paper in pending:
+                summary = (results.get(paper.id) or "").strip()
+                if summary:
+                    await self._store_summary(self._get_cache_key(paper.abstract, 1), summary)
+                    summaries[paper.id] = summary
+                else:
+                    summaries[paper.id] = "Summary unavailable"
+            return summaries
+
         except Exception as e:
-            print(f"Gemini API error: {e}")
-            raise Exception(f"Failed to generate summary: {str(e)}")
-    
+            logger.error(f"Level-1 batch generation error: {e}")
+            raise Exception(f"Failed to generate level-1 batch: {str(e)}")
+
+    async def submit_batch_summaries(self, papers: List, level: Literal[1, 2, 3]) -> str:
+        """
+        Submit summaries for many papers as one asynchronous batch job
+
+        Packages one chat-completion request per paper into a JSONL file
+        and hands it to the provider's Batch API (50% cheaper than
+        interactive calls). The caller polls get_batch_summaries with the
+        returned ID.
+
+        Args:
+            papers: Paper objects to summarize
+            level: Detail level (full text is fetched for levels 2 & 3)
+
+        Returns:
+            Provider batch job ID
+
+        Raises:
+            Exception: If the upload or batch submission fails
+        """
+        # Levels 2 & 3 need full text; fetch it for the whole set up front
+        full_texts = {}
+        if level in FULLTEXT_LEVELS:
+            full_texts = await arxiv_client.get_full_texts([p.id for p in papers])
+
+        static_prompt = LEVEL_PROMPTS[level]
+        lines = []
+        for paper in papers:
+            content = full_texts.get(paper.id) or paper.abstract
+            lines.append(orjson.dumps({
+                "custom_id": paper.id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": self.models[level],
+                    "messages": [
+                        {
+                            "role": "system",
+                            "content": static_prompt,
+                        },
+                        {
+                            "role": "user",
+                            "content": CONTENT_PREFIXES[level] + content,
+                        },
+                    ],
+                    "max_tokens": self.max_tokens[level],
+                    "temperature": 0.7,
+                },
+            }).decode())
+
+        try:
+            logger.info(f"Submitting batch summarize job for {len(papers)} papers (level {level})")
+            batch_file = await self.client.files.create(
+                file=("summaries.jsonl", "\n".join(lines).encode()),
+                purpose="batch"
+            )
+            batch = await self.client.batches.create(
+                input_file_id=batch_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h"
+            )
+            logger.info(f"Batch job {batch.id} submitted (status={batch.status})")
+            return batch.id
+        except Exception as e:
+            logger.error(f"Batch submission error: {e}")
+            raise Exception(f"Failed to submit batch job: {str(e)}")
+
+    async def get_batch_summaries(self, batch_id: str):
+        """
+        Check an asynchronous batch job and collect its results
+
+        Args:
+            batch_id: ID returned by submit_batch_summaries
+
+        Returns:
+            Tuple of (status, summaries) where summaries is a dict keyed
+            by paper ID once the job completed, else None
+        """
+        batch = await self.client.batches.retrieve(batch_id)
+        if batch.status != "completed":
+            return batch.status, None
+
+        output = await self.client.files.content(batch.output_file_id)
+        summaries = {}
+        for line in output.text.splitlines():
+            if not line.strip():
+                continue
+            try:
+                result = orjson.loads(line)
+                message = result["response"]["body"]["choices"][0]["message"]
+                summaries[result["custom_id"]] = message["content"].strip()
+            except (KeyError, IndexError, ValueError) as e:
+                logger.warning(f"Malformed batch result line: {e}")
+        return batch.status, summaries
+
     async def generate_all_levels(self, abstract: str, paper_id: Optional[str] = None) -> Dict[int, str]:
         """
         Generate summaries for all 3 levels at once
@@ -264,14 +748,24 @@ Summary:"""
         Returns:
             Dictionary with keys 1, 2, 3 mapping to summaries
         """
+        # Warm the per-paper full-text cache once so levels 2 and 3
+        # don't race to fetch it, then run all three levels in parallel
+        if paper_id:
+            await self._get_full_text(paper_id)
+
+        results = await asyncio.gather(
+            *(self.generate_summary(abstract, level, paper_id) for level in (1, 2, 3)),
+            return_exceptions=True
+        )
+
         summaries = {}
-        for level in [1, 2, 3]:
-            try:
-                summaries[level] = await self.generate_summary(abstract, level, paper_id)
-            except Exception as e:
-                print(f"Failed to generate level {level}: {e}")
+        for level, result in zip((1, 2, 3), results):
+            if isinstance(result, Exception):
+                logger.warning(f"Failed to generate level {level}: {result}")
                 summaries[level] = f"Summary unavailable for level {level}"
-        
+            else:
+                summaries[level] = result
+
         return summaries
     
     async def generate_chat_response(
@@ -307,16 +801,14 @@ Summary:"""
         # Fetch full text if requested
         paper_content = paper_abstract
         if include_full_text:
-            from app.arxiv_client import arxiv_client
-            
-            print(f"Fetching full text for chat about paper {paper_id}...")
+            logger.info(f"Fetching full text for chat about paper {paper_id}...")
             full_text = await arxiv_client.get_full_text(paper_id)
             
             if full_text:
                 paper_content = full_text
-                print(f"Using full text ({len(full_text)} chars)")
+                logger.info(f"Using full text ({len(full_text)} chars)")
             else:
-                print(f"Full text not available, using abstract")
+                logger.info(f"Full text not available, using abstract")
         
         # Build system prompt with paper context
         authors_str = ", ".join(paper_authors[:5])
@@ -352,10 +844,10 @@ Answer the user's questions about this paper clearly and accurately. Be specific
         messages.append({"role": "user", "content": user_message})
         
         try:
-            print(f"Generating chat response for: '{user_message[:50]}...'")
+            logger.info(f"Generating chat response for: '{user_message[:50]}...'")
             
             # Call Gemini API
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model="gemini-2.5-flash-lite",
                 messages=messages,
                 max_tokens=2000,
@@ -364,12 +856,12 @@ Answer the user's questions about this paper clearly and accurately. Be specific
             
             assistant_message = response.choices[0].message.content.strip()
             
-            print(f"Generated chat response ({len(assistant_message)} chars)")
+            logger.info(f"Generated chat response ({len(assistant_message)} chars)")
             
             return assistant_message
             
         except Exception as e:
-            print(f"Chat API error: {e}")
+            logger.error(f"Chat API error: {e}")
             raise Exception(f"Failed to generate chat response: {str(e)}")
 
 